@@ -0,0 +1,284 @@
+"""Asynchronous Questrade API wrapper based on aiohttp.
+
+This module provides an async variant of the core :class:`qtrade.Questrade` class for
+workloads that issue many independent API calls (e.g. quotes or historical data for a
+basket of tickers). Running the calls concurrently on the event loop overlaps the
+network latency, so the wall-clock time approaches the slowest single call instead of
+the sum of all calls.
+
+The class is used as an async context manager::
+
+    async with AsyncQuestrade(token_yaml="access_token.yml") as qtrade:
+        quotes = await qtrade.get_quotes_batch(["XYZ", "ABC"])
+
+Requires the optional ``aiohttp`` dependency (``pip install qtrade[async]``).
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Union
+
+import aiohttp
+
+from .questrade import TOKEN_URL
+from .utility import TokenDict, get_access_token_yaml, validate_access_token
+
+log = logging.getLogger(__name__)  # pylint: disable=C0103
+
+# default cap on in-flight requests so concurrent batches stay under Questrade's
+# per-account rate limit
+DEFAULT_MAX_CONCURRENCY = 10
+
+
+class AsyncQuestrade:
+    """Asynchronous Questrade baseclass.
+
+    This class mirrors the quote and market-data methods of :class:`qtrade.Questrade`
+    with ``async`` counterparts, sharing one aiohttp session across all calls. A
+    semaphore bounds the number of concurrent requests. An instance needs to be either
+    initialized with an access_code or the path of a access token yaml file, and must
+    be entered as an async context manager before use.
+
+    Parameters
+    ----------
+    access_code: str, optional
+        Access code from Questrade
+    token_yaml: str, optional
+        Path of the yaml-file holding the token payload
+    max_concurrency: int, optional
+        Maximum number of requests in flight at once. Default 10.
+    """
+
+    def __init__(
+        self,
+        access_code: Optional[str] = None,
+        token_yaml: Optional[str] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ):
+        self.access_token: TokenDict
+        self.access_code = access_code
+        self.token_yaml = token_yaml
+        self._session: Optional[aiohttp.ClientSession] = None
+        # created in __aenter__ so the semaphore binds to the running loop; binding
+        # it at construction breaks under asyncio.run() on older Python versions
+        self._max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self) -> "AsyncQuestrade":
+        """Resolve the access token and open the shared aiohttp session."""
+        if self.access_code is None and self.token_yaml is not None:
+            self.access_token = get_access_token_yaml(self.token_yaml)
+        else:
+            await self._get_access_token()
+
+        headers = {
+            "Authorization": self.access_token["token_type"]
+            + " "
+            + self.access_token["access_token"]
+        }
+        self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        self._session = aiohttp.ClientSession(
+            headers=headers, connector=aiohttp.TCPConnector(limit_per_host=64)
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        """Close the aiohttp session when the context manager exits."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _get_access_token(self):
+        """Get the access token from the access code.
+
+        Uses a short-lived session since the authenticated session does not exist yet.
+        """
+        url = TOKEN_URL + str(self.access_code)
+        log.info("Getting access token...")
+        async with aiohttp.ClientSession() as session:
+            async with session.get(url) as resp:
+                resp.raise_for_status()
+                response = await resp.json()
+
+        # validate response
+        validate_access_token(response)
+
+        self.access_token = response
+
+        # clean the api_server entry of the escape characters
+        self.access_token["api_server"] = self.access_token["api_server"].replace("\\", "")
+        if self.access_token["api_server"][-1] == "/":
+            self.access_token["api_server"] = self.access_token["api_server"][:-1]
+
+    async def _send_message(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict] = None,
+        json: Optional[Dict] = None,
+    ) -> Dict[str, Any]:
+        """Send an API request, bounded by the concurrency semaphore.
+
+        Parameters
+        ----------
+        method: str
+            HTTP method (get, post, delete, etc.)
+        endpoint: str
+            Endpoint (to be added to base URL)
+        params: dict, optional
+            HTTP request parameters
+        json: dict, optional
+            Dictionary payload for POST
+
+        Returns
+        -------
+        dict/list:
+            JSON response
+        """
+        if self._session is None or self._semaphore is None:
+            log.error("Session not started, use 'async with AsyncQuestrade(...)'...")
+            raise Exception("Session not started, use 'async with AsyncQuestrade(...)'...")
+        url = self.access_token["api_server"] + "/v1/" + endpoint
+        async with self._semaphore:
+            async with self._session.request(method, url, params=params, json=json) as resp:
+                resp.raise_for_status()
+                return await resp.json()
+
+    async def ticker_information(self, tickers: Union[str, List[str]]) -> Union[Dict, List[Dict]]:
+        """Get ticker information.
+
+        This coroutine gets information such as a quote for a single ticker or a list
+        of tickers.
+
+        Parameters
+        ----------
+        tickers: str or [str]
+            List of tickers or a single ticker
+
+        Returns
+        -------
+        dict or [dict]
+            Dictionary with ticker information or list of dictionaries with ticker information
+        """
+        if isinstance(tickers, str):
+            tickers = [tickers]
+
+        payload = {"names": ",".join(tickers)}
+
+        log.info("Getting ticker data...")
+        response = await self._send_message("get", "symbols", params=payload)
+        if "symbols" not in response:
+            log.error(response)
+            raise Exception("API response is missing 'symbols' entry")
+        symbols = response["symbols"]
+
+        if len(tickers) == 1:
+            symbols = symbols[0]
+
+        return symbols
+
+    async def get_quote(self, tickers: Union[str, List[str]]) -> Union[Dict, List[Dict]]:
+        """Get quote.
+
+        This coroutine gets quotes for a single ticker or a list of tickers.
+
+        Parameters
+        ----------
+        tickers: str or [str]
+            List of tickers or a single ticker
+
+        Returns
+        -------
+        dict or [dict]
+            Dictionary with quotes or list of dictionaries with quotes
+        """
+        if isinstance(tickers, str):
+            tickers = [tickers]
+
+        # translate tickers to IDs
+        info = await self.ticker_information(tickers)
+        if len(tickers) == 1 and isinstance(info, dict):
+            ids = [info["symbolId"]]
+        else:
+            ids = [stock["symbolId"] for stock in info]
+
+        payload = {"ids": ",".join(map(str, ids))}
+
+        log.info("Getting quote...")
+        response = await self._send_message("get", "markets/quotes", params=payload)
+        if "quotes" not in response:
+            log.error(response)
+            raise Exception("API response is missing 'quotes' entry")
+        quotes = response["quotes"]
+
+        if len(ids) == 1:
+            quotes = quotes[0]
+
+        return quotes
+
+    async def get_historical_data(
+        self, ticker: str, start_date: str, end_date: str, interval: str
+    ) -> List:
+        """Get historical ticker data.
+
+        This coroutine gets historical data for a time interval and a defined time
+        frequency.
+
+        Parameters
+        ----------
+        ticker: str
+            Ticker Symbol
+        start_date: str
+            Date in the format YYYY-MM-DD
+        end_date: str
+            Date in the format YYYY-MM-DD
+        interval: str
+            Time frequency, i.e. OneDay.
+
+        Returns
+        -------
+        list:
+            list of historical data for each interval. The list is ordered by date.
+        """
+        info = await self.ticker_information(ticker)
+        if isinstance(info, dict):
+            ids = info["symbolId"]
+        else:
+            log.error(f"Something went wrong retrieving the symbol ID for ticker {ticker}...")
+            raise Exception(f"Something went wrong retrieving the symbol ID for ticker {ticker}...")
+
+        payload = {
+            "startTime": str(start_date) + "T00:00:00-05:00",
+            "endTime": str(end_date) + "T00:00:00-05:00",
+            "interval": str(interval),
+        }
+
+        log.info(
+            "Getting historical data for {0} from {1} to {2}".format(ticker, start_date, end_date)
+        )
+
+        response = await self._send_message("get", "markets/candles/" + str(ids), params=payload)
+        if "candles" not in response:
+            log.error(response)
+            raise Exception("API response is missing 'candles' entry")
+        quotes = response["candles"]
+
+        return quotes
+
+    async def get_quotes_batch(self, tickers: List[str]) -> List[Union[Dict, List[Dict]]]:
+        """Get quotes for many tickers concurrently.
+
+        Convenience helper that fans out :meth:`get_quote` over the event loop; the
+        semaphore keeps the number of requests in flight bounded.
+
+        Parameters
+        ----------
+        tickers: [str]
+            List of tickers
+
+        Returns
+        -------
+        list:
+            List of quote dictionaries, in the same order as the input tickers.
+        """
+        return list(await asyncio.gather(*[self.get_quote(ticker) for ticker in tickers]))
@@ -1,17 +1,129 @@
 """Core module for Questrade API wrapper."""
 
+import json
 import logging
-from typing import Any, Dict, List, Optional, Union
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union, cast
 
 import requests
-import yaml
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-from .utility import TokenDict, get_access_token_yaml, validate_access_token
+from .utility import TokenDict, candles_to_arrays, get_access_token_yaml, validate_access_token
 
 log = logging.getLogger(__name__)  # pylint: disable=C0103
 
+try:  # use orjson when available; it parses large candle/activity payloads much faster
+    import orjson
+
+    def _parse_response(resp) -> Any:
+        """Parse a JSON response body from the raw bytes."""
+        return orjson.loads(resp.content)
+
+    def _parse_bytes(data: bytes) -> Any:
+        """Parse a JSON document from raw bytes."""
+        return orjson.loads(data)
+
+except ImportError:
+
+    def _parse_response(resp) -> Any:
+        """Parse a JSON response body via the stdlib json module."""
+        return resp.json()
+
+    def _parse_bytes(data: bytes) -> Any:
+        """Parse a JSON document via the stdlib json module."""
+        return json.loads(data)
+
+
+def _as_list(tickers: Union[str, List[str]]) -> List[str]:
+    """Normalize a single ticker or an iterable of tickers to a list."""
+    return [tickers] if isinstance(tickers, str) else list(tickers)
+
+
 TOKEN_URL = "https://login.questrade.com/oauth2/token?grant_type=refresh_token&refresh_token="
 
+# translation table that strips the escape backslashes from the api_server entry in
+# one C-level pass
+_API_SERVER_TRANSLATE = str.maketrans("", "", "\\")
+
+# safety buffer (in seconds) subtracted from the token lifetime so a request does not
+# start with a token that expires mid-flight
+TOKEN_EXPIRY_BUFFER = 30
+
+# Questrade allows roughly 20 account-data requests per second; pace requests slightly
+# under that so bursts do not trigger 429 responses in the first place
+RATE_LIMIT_PER_SECOND = 20
+
+# connection-pool sizing for the mounted HTTPAdapter; pool_maxsize stays above the
+# default thread-pool fan-out so parallel fetches never fall back to single-use
+# connections
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = 50
+
+
+class _RateLimiter:
+    """Monotonic-clock token bucket used to pace requests under the API rate limit.
+
+    Proactively pacing requests is cheaper than reactively retrying 429 responses:
+    the cost of a small sleep replaces a failed round-trip plus backoff delay.
+
+    Parameters
+    ----------
+    capacity: int
+        Maximum number of requests allowed in a burst.
+    refill_rate: float
+        Tokens added per second.
+    """
+
+    def __init__(self, capacity: int, refill_rate: float):
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self._tokens = float(capacity)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until one is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._last_refill) * self.refill_rate
+                )
+                self._last_refill = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.refill_rate
+            time.sleep(wait)
+
+    def throttle_from_headers(self, headers):
+        """Slow the refill rate when the server reports little remaining quota.
+
+        The throttle is one-way: the refill rate only ever decreases for the
+        lifetime of the instance, trading peak throughput for staying clear of
+        the server-side limit.
+
+        Parameters
+        ----------
+        headers: mapping
+            Response headers, checked for X-RateLimit-Remaining.
+        """
+        remaining = headers.get("X-RateLimit-Remaining")
+        if remaining is None:
+            return
+        try:
+            remaining = int(remaining)
+        except ValueError:
+            # runs after a successful request, so a malformed header value must
+            # not discard an otherwise good response
+            return
+        if remaining < self.capacity // 4:
+            self.refill_rate = max(1.0, self.refill_rate / 2)
+
 
 class Questrade:
     """Questrade baseclass.
@@ -26,32 +138,73 @@ class Questrade:
         Access code from Questrade
     token_yaml: str, optional
         Path of the yaml-file holding the token payload
+    token_dict: dict, optional
+        Already-parsed token payload, e.g. loaded from a secrets store. Skips the
+        yaml file read entirely.
     save_yaml: bool, optional
         Boolean to indicate if the token payload will be saved in a yaml-file. Default True.
+    session: requests.Session, optional
+        Existing session to reuse, e.g. one shared between several Questrade instances
+        in a web app so they draw from the same connection pool. A shared session is
+        not closed by this instance; the caller stays responsible for its lifetime.
     """
 
     def __init__(
         self,
         access_code: Optional[str] = None,
         token_yaml: Optional[str] = None,
+        token_dict: Optional[TokenDict] = None,
         save_yaml: bool = True,
+        session: Optional[requests.Session] = None,
     ):
         self.access_token: TokenDict
         self.headers = None
-        self.session = requests.Session()
+        self._owns_session = session is None
+        if session is not None:
+            self.session = session
+        else:
+            self.session = requests.Session()
+            # pool connections so repeated calls to the login and API hosts reuse the
+            # same TCP/TLS connection instead of paying a new handshake per request,
+            # and retry transient errors with exponential backoff, honoring
+            # Retry-After on 429; allowed_methods needs the declared urllib3>=1.26
+            # floor (backoff_jitter would need urllib3>=2, which stays undeclared)
+            retry = Retry(
+                total=3,
+                backoff_factor=1.0,
+                status_forcelist=(408, 429, 500, 502, 503, 504),
+                allowed_methods=frozenset(["GET", "POST"]),
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(
+                pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=retry
+            )
+            self.session.mount("https://", adapter)
 
         self.access_code = access_code
         self.token_yaml = token_yaml
 
-        if access_code is None and self.token_yaml is not None:
-            self.access_token = get_access_token_yaml(self.token_yaml)
-            self.headers = {
-                "Authorization": self.access_token["token_type"]
-                + " "
-                + self.access_token["access_token"]
-            }
-            # add headers to session
-            self.session.headers.update(self.headers)
+        self._token_expiry = 0.0
+        self._last_saved_token: Optional[Tuple[str, Dict]] = None
+        self._symbol_id_cache: Dict[str, int] = {}
+        self._limiter = _RateLimiter(
+            capacity=RATE_LIMIT_PER_SECOND, refill_rate=float(RATE_LIMIT_PER_SECOND)
+        )
+
+        if access_code is None and (token_dict is not None or self.token_yaml is not None):
+            if token_dict is not None:
+                validate_access_token(token_dict)
+                self.access_token = dict(token_dict)  # type: ignore
+            else:
+                # the outer condition guarantees a yaml path when no dict was given,
+                # but mypy cannot narrow the attribute through the compound check
+                assert self.token_yaml is not None
+                self.access_token = get_access_token_yaml(self.token_yaml)
+            self._token_expiry = (
+                time.monotonic() + int(self.access_token["expires_in"]) - TOKEN_EXPIRY_BUFFER
+            )
+            self._set_auth_state()
         else:
             self._get_access_token(save_yaml=save_yaml)
 
@@ -65,6 +218,8 @@ class Questrade:
         params: Optional[Dict] = None,
         data: Optional[Dict] = None,
         json: Optional[Dict] = None,
+        headers: Optional[Dict] = None,
+        stream: bool = False,
     ) -> Dict[str, Any]:  # pylint: disable=R0913
         """Send an API request.
 
@@ -80,6 +235,11 @@ class Questrade:
             JSON-encoded string payload for POST
         json: dict, optional
             Dictionary payload for POST
+        headers: dict, optional
+            Extra headers merged over the session headers for this request
+        stream: bool, optional
+            Read the body in chunks instead of buffering it through requests; useful
+            for large candle or activity responses. The parsed result is the same.
 
         Returns
         -------
@@ -87,26 +247,132 @@ class Questrade:
             JSON response
         """
         if self.access_token is not None:
-            url = self.access_token["api_server"] + "/v1/" + endpoint
+            self._ensure_fresh_token()
+            url = f"{self._api_base}/{endpoint}"
         else:
             log.error("Access token not set...")
             raise Exception("Access token not set...")
-        resp = self.session.request(method, url, params=params, data=data, json=json, timeout=30)
+        self._limiter.acquire()
+        resp = self.session.request(
+            method,
+            url,
+            params=params,
+            data=data,
+            json=json,
+            headers=headers,
+            stream=stream,
+            timeout=30,
+        )
         resp.raise_for_status()
-        return resp.json()
+        self._limiter.throttle_from_headers(resp.headers)
+        if stream:
+            # pull the body in chunks so requests never holds a second full copy of
+            # the raw bytes alongside the decoded content
+            buf = bytearray()
+            try:
+                for chunk in resp.iter_content(chunk_size=64 * 1024):
+                    buf += chunk
+            finally:
+                resp.close()
+            return _parse_bytes(bytes(buf))
+        return _parse_response(resp)
+
+    def _stream_items(
+        self, endpoint: str, prefix: str, params: Optional[Dict] = None
+    ) -> Iterator[Dict]:
+        """Stream items of a large JSON array response incrementally.
+
+        Instead of buffering the whole body and building one big list, the response is
+        read as it arrives and items are yielded one at a time, keeping peak memory
+        roughly constant. Requires the optional ``ijson`` dependency.
+
+        Parameters
+        ----------
+        endpoint: str
+            Endpoint (to be added to base URL)
+        prefix: str
+            ijson item prefix, e.g. ``candles.item``
+        params: dict, optional
+            HTTP request parameters
+
+        Yields
+        ------
+        dict:
+            One decoded item of the response array at a time.
+        """
+        import ijson  # local import so ijson stays an optional dependency
+
+        self._ensure_fresh_token()
+        url = f"{self._api_base}/{endpoint}"
+        self._limiter.acquire()
+        resp = self.session.request("get", url, params=params, stream=True, timeout=30)
+        resp.raise_for_status()
+        try:
+            yield from ijson.items(resp.raw, prefix)
+        finally:
+            resp.close()
+
+    def _set_auth_state(self):
+        """Cache the API base URL and Authorization header derived from the token.
+
+        Both values are stable for the lifetime of the token, so they are computed
+        once here instead of being reassembled on every request.
+        """
+        self._api_base = self.access_token["api_server"].rstrip("/") + "/v1"
+        auth = f"{self.access_token['token_type']} {self.access_token['access_token']}"
+        self.headers = {"Authorization": auth}
+        # install the pre-encoded bytes on the session so the header is not re-encoded
+        # on every request; it only changes when the token rotates
+        self.session.headers["Authorization"] = auth.encode("ascii")
+
+    def _ensure_fresh_token(self):
+        """Refresh the access token if it is at or past its cached expiry time.
+
+        The expiry is cached from the token's ``expires_in`` (minus a small safety
+        buffer), so a refresh round-trip is only paid when the token is actually
+        about to expire instead of before every API call. For tokens loaded from a
+        yaml file the cached expiry assumes the file was written at issuance time;
+        a stale file only costs one extra refresh on the first call. Questrade
+        refresh tokens are single-use, so when the instance was built from a yaml
+        file the rotated token is persisted back to it right away — otherwise the
+        file keeps a consumed refresh token and the next process start cannot
+        authenticate.
+        """
+        if time.monotonic() >= self._token_expiry:
+            log.debug("Access token expired, refreshing...")
+            self.refresh_access_token(from_yaml=False)
+            if self.token_yaml is not None:
+                self.save_token_to_yaml(yaml_path=self.token_yaml)
 
     def save_token_to_yaml(self, yaml_path: str = "access_token.yml"):
         """Save the token payload as a yaml-file.
 
+        If the path has a ``.json`` extension, the token is serialized with the (much
+        faster) json module instead; the payload is a flat dict, so both formats hold
+        the same data.
+
         Parameters
         ----------
         yaml_path: str, optional
-            Path of the yaml-file. If the file already exists, it will be overwritten. Defaults to
-            access_token.yml
+            Path of the yaml- or json-file. If the file already exists, it will be
+            overwritten. Defaults to access_token.yml
         """
+        if (yaml_path, self.access_token) == self._last_saved_token:
+            log.debug("Access token unchanged, skipping yaml file write...")
+            return
         with open(yaml_path, "w") as yaml_file:
-            log.debug("Saving access token to yaml file...")
-            yaml.dump(self.access_token, yaml_file)
+            if yaml_path.endswith(".json"):
+                log.debug("Saving access token to json file...")
+                json.dump(self.access_token, yaml_file)
+            else:
+                # local import keeps PyYAML off the import path for users who
+                # authenticate with an access code and never persist a yaml token
+                import yaml
+
+                log.debug("Saving access token to yaml file...")
+                dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+                yaml.dump(dict(self.access_token), yaml_file, Dumper=dumper)
+        self._last_saved_token = (yaml_path, dict(self.access_token))
 
     def _get_access_token(
         self, save_yaml: bool = False, yaml_path: str = "access_token.yml"
@@ -129,30 +395,31 @@ class Questrade:
         dict
             Dict with the access token data.
         """
-        url = TOKEN_URL + str(self.access_code)
+        url = f"{TOKEN_URL}{self.access_code}"
         log.info("Getting access token...")
-        data = requests.get(url)
+        self._limiter.acquire()
+        # go through the session so the TLS connection to the login host is reused across
+        # refreshes; the Bearer header is stripped (a None value deletes it for this
+        # request only, which the requests stubs do not model) since the login
+        # endpoint does not need it
+        token_headers = cast(Dict[str, str], {"Authorization": None})
+        data = self.session.get(url, headers=token_headers, timeout=30)
         data.raise_for_status()
-        response = data.json()
+        response = _parse_response(data)
 
         # validate response
-        validate_access_token(**response)
+        validate_access_token(response)
 
         self.access_token = response
+        self._token_expiry = time.monotonic() + int(response["expires_in"]) - TOKEN_EXPIRY_BUFFER
 
-        # clean the api_server entry of the escape characters
-        self.access_token["api_server"] = self.access_token["api_server"].replace("\\", "")
-        if self.access_token["api_server"][-1] == "/":
-            self.access_token["api_server"] = self.access_token["api_server"][:-1]
-
-        # set headers
-        self.headers = {
-            "Authorization": self.access_token["token_type"]
-            + " "
-            + self.access_token["access_token"]
-        }
+        # clean the api_server entry of the escape characters and any trailing slash
+        self.access_token["api_server"] = (
+            self.access_token["api_server"].translate(_API_SERVER_TRANSLATE).rstrip("/")
+        )
 
-        self.session.headers.update(self.headers)
+        # set headers and cached base URL
+        self._set_auth_state()
 
         # save access token
         if save_yaml:
@@ -189,31 +456,31 @@ class Questrade:
         else:
             old_access_token = self.access_token
 
-        url = TOKEN_URL + str(old_access_token["refresh_token"])
+        url = f"{TOKEN_URL}{old_access_token['refresh_token']}"
         log.info("Refreshing access token...")
-        data = requests.get(url)
+        self._limiter.acquire()
+        # go through the session so the TLS connection to the login host is reused across
+        # refreshes; the Bearer header is stripped (a None value deletes it for this
+        # request only, which the requests stubs do not model) since the login
+        # endpoint does not need it
+        token_headers = cast(Dict[str, str], {"Authorization": None})
+        data = self.session.get(url, headers=token_headers, timeout=30)
         data.raise_for_status()
-        response = data.json()
+        response = _parse_response(data)
 
         # validate response
-        validate_access_token(**response)
+        validate_access_token(response)
         # set access token
         self.access_token = response
+        self._token_expiry = time.monotonic() + int(response["expires_in"]) - TOKEN_EXPIRY_BUFFER
 
-        # clean the api_server entry of the escape characters
-        self.access_token["api_server"] = self.access_token["api_server"].replace("\\", "")
-        if self.access_token["api_server"][-1] == "/":
-            self.access_token["api_server"] = self.access_token["api_server"][:-1]
-
-        # set headers
-        self.headers = {
-            "Authorization": self.access_token["token_type"]
-            + " "
-            + self.access_token["access_token"]
-        }
+        # clean the api_server entry of the escape characters and any trailing slash
+        self.access_token["api_server"] = (
+            self.access_token["api_server"].translate(_API_SERVER_TRANSLATE).rstrip("/")
+        )
 
-        # update headers
-        self.session.headers.update(self.headers)
+        # set headers and cached base URL
+        self._set_auth_state()
 
         # save access token
         if from_yaml:
@@ -234,13 +501,10 @@ class Questrade:
         log.info("Getting account ID...")
         response: Dict[str, List[Dict[str, int]]] = self._send_message("get", "accounts")
 
-        account_id = []
-        try:
-            for account in response["accounts"]:
-                account_id.append(account["number"])
-        except Exception:
+        if "accounts" not in response:
             log.error(response)
-            raise Exception
+            raise Exception("API response is missing 'accounts' entry")
+        account_id = [account["number"] for account in response["accounts"]]
 
         self.account_id = account_id  # type: ignore
 
@@ -283,12 +547,11 @@ class Questrade:
 
         """
         log.info("Getting account positions...")
-        response = self._send_message("get", "accounts/" + str(account_id) + "/positions")
-        try:
-            positions = response["positions"]
-        except Exception:
-            print(response)
-            raise Exception
+        response = self._send_message("get", f"accounts/{account_id}/positions")
+        if "positions" not in response:
+            log.error(response)
+            raise Exception("API response is missing 'positions' entry")
+        positions = response["positions"]
 
         self.positions = positions
 
@@ -310,14 +573,12 @@ class Questrade:
             Dictionary holding balance information
         """
         log.info("Getting account activities...")
-        response = self._send_message("get", "accounts/" + str(account_id) + "/balances")
-        try:
-            return response
-        except Exception:
-            print(response)
-            raise Exception
+        response = self._send_message("get", f"accounts/{account_id}/balances")
+        return response
 
-    def get_account_activities(self, account_id: int, start_date: str, end_date: str) -> List[Dict]:
+    def get_account_activities(
+        self, account_id: int, start_date: str, end_date: str, stream: bool = False
+    ) -> Union[List[Dict], Iterator[Dict]]:
         """Get account activities.
 
         This method will get the account activities for a given account ID in a given time
@@ -351,6 +612,10 @@ class Questrade:
             Start date of time period, format YYYY-MM-DD
         end_date: str
             End date of time period, format YYYY-MM-DD
+        stream: bool, optional
+            If True, return a generator that yields activities one at a time as the
+            response is parsed incrementally (requires the optional ijson package)
+            instead of buffering the full list. Default False.
 
         Returns
         -------
@@ -360,22 +625,24 @@ class Questrade:
 
         """
         payload = {
-            "startTime": str(start_date) + "T00:00:00-05:00",
-            "endTime": str(end_date) + "T00:00:00-05:00",
+            "startTime": f"{start_date}T00:00:00-05:00",
+            "endTime": f"{end_date}T00:00:00-05:00",
         }
 
         log.info("Getting account activities...")
+        if stream:
+            return self._stream_items(
+                f"accounts/{account_id}/activities", "activities.item", params=payload
+            )
         response = self._send_message(
-            "get", "accounts/" + str(account_id) + "/activities", params=payload
+            "get", f"accounts/{account_id}/activities", params=payload, stream=True
         )
 
-        try:
-            activities = response["activities"]
-        except Exception:
-            print(response)
-            raise Exception
+        if "activities" not in response:
+            log.error(response)
+            raise Exception("API response is missing 'activities' entry")
 
-        return activities
+        return response["activities"]
 
     def get_account_executions(self, account_id: int, start_date: str, end_date: str) -> List[Dict]:
         """Get account executions.
@@ -427,22 +694,18 @@ class Questrade:
 
         """
         payload = {
-            "startTime": str(start_date) + "T00:00:00-05:00",
-            "endTime": str(end_date) + "T00:00:00-05:00",
+            "startTime": f"{start_date}T00:00:00-05:00",
+            "endTime": f"{end_date}T00:00:00-05:00",
         }
 
         log.info("Getting account executions...")
-        response = self._send_message(
-            "get", "accounts/" + str(account_id) + "/executions", params=payload
-        )
+        response = self._send_message("get", f"accounts/{account_id}/executions", params=payload)
 
-        try:
-            executions = response["executions"]
-        except Exception:
-            print(response)
-            raise Exception
+        if "executions" not in response:
+            log.error(response)
+            raise Exception("API response is missing 'executions' entry")
 
-        return executions
+        return response["executions"]
 
     def ticker_information(self, tickers: Union[str, List[str]]) -> Union[Dict, List[Dict]]:
         """Get ticker information.
@@ -459,24 +722,66 @@ class Questrade:
         dict or [dict]
             Dictionary with ticker information or list of dictionaries with ticker information
         """
-        if isinstance(tickers, str):
-            tickers = [tickers]
+        tickers = _as_list(tickers)
 
         payload = {"names": ",".join(tickers)}
 
         log.info("Getting ticker data...")
         response = self._send_message("get", "symbols", params=payload)
-        try:
-            symbols = response["symbols"]
-        except Exception:
-            print(response)
-            raise Exception
+        if "symbols" not in response:
+            log.error(response)
+            raise Exception("API response is missing 'symbols' entry")
+        symbols = response["symbols"]
 
         if len(tickers) == 1:
             symbols = symbols[0]
 
         return symbols
 
+    def _resolve_symbol_ids(self, tickers: List[str]) -> List[int]:
+        """Translate tickers to symbol IDs, using the instance-level cache.
+
+        Symbol IDs are stable per ticker, so every ticker only has to be looked up via
+        the symbols endpoint once per instance; repeat calls are served from the cache
+        without a network round-trip.
+
+        Parameters
+        ----------
+        tickers: [str]
+            List of tickers
+
+        Returns
+        -------
+        list:
+            List of symbol IDs, in the same order as the input tickers.
+        """
+        missing = [ticker for ticker in tickers if ticker not in self._symbol_id_cache]
+        if missing:
+            info = self.ticker_information(missing)
+            if isinstance(info, dict):
+                info = [info]
+            if len(info) != len(missing):
+                log.error(f"Could not retrieve symbol IDs for all of {missing}...")
+                raise Exception(f"Could not retrieve symbol IDs for all of {missing}...")
+            for ticker, entry in zip(missing, info):
+                self._symbol_id_cache[ticker] = entry["symbolId"]
+
+        return [self._symbol_id_cache[ticker] for ticker in tickers]
+
+    def invalidate_symbol_cache(self, ticker: Optional[str] = None):
+        """Invalidate the ticker to symbol ID cache.
+
+        Parameters
+        ----------
+        ticker: str, optional
+            Single ticker to drop from the cache (e.g. after a re-org). If omitted,
+            the whole cache is cleared.
+        """
+        if ticker is None:
+            self._symbol_id_cache.clear()
+        else:
+            self._symbol_id_cache.pop(ticker, None)
+
     def get_quote(self, tickers: List[str]) -> Union[Dict, List[Dict]]:
         """Get quote.
 
@@ -492,25 +797,19 @@ class Questrade:
         dict or [dict]
             Dictionary with quotes or list of dictionaries with quotes
         """
-        if isinstance(tickers, str):
-            tickers = [tickers]
+        tickers = _as_list(tickers)
 
         # translate tickers to IDs
-        info = self.ticker_information(tickers)
-        if len(tickers) == 1 and isinstance(info, dict):
-            ids = [info["symbolId"]]
-        else:
-            ids = [stock["symbolId"] for stock in info]
+        ids = self._resolve_symbol_ids(tickers)
 
         payload = {"ids": ",".join(map(str, ids))}
 
         log.info("Getting quote...")
         response = self._send_message("get", "markets/quotes", params=payload)
-        try:
-            quotes = response["quotes"]
-        except Exception:
-            print(response)
-            raise Exception
+        if "quotes" not in response:
+            log.error(response)
+            raise Exception("API response is missing 'quotes' entry")
+        quotes = response["quotes"]
 
         if len(ids) == 1:
             quotes = quotes[0]
@@ -518,8 +817,14 @@ class Questrade:
         return quotes
 
     def get_historical_data(
-        self, ticker: str, start_date: str, end_date: str, interval: str
-    ) -> List:
+        self,
+        ticker: str,
+        start_date: str,
+        end_date: str,
+        interval: str,
+        stream: bool = False,
+        as_arrays: bool = False,
+    ) -> Union[List, Dict, Iterator[Dict]]:  # pylint: disable=R0913
         """Get historical ticker data.
 
         This method get gets historical data for a time interval and a defined time frequency.
@@ -534,42 +839,114 @@ class Questrade:
             Date in the format YYYY-MM-DD
         interval: str
             Time frequency, i.e. OneDay.
+        stream: bool, optional
+            If True, return a generator that yields candles one at a time as the
+            response is parsed incrementally (requires the optional ijson package)
+            instead of buffering the full list. Default False.
+        as_arrays: bool, optional
+            If True, return the numeric candle fields as a dictionary of NumPy arrays
+            (requires the optional numpy package) instead of a list of dictionaries,
+            so moving averages and similar statistics can be vectorized. Cannot be
+            combined with stream. Default False.
 
         Returns
         -------
         list:
             list of historical data for each interval. The list is ordered by date.
         """
-        # translate tickers to IDs
-        info = self.ticker_information(ticker)
-        if isinstance(info, dict):
-            ids = info["symbolId"]
-        else:
-            log.error(f"Something went wrong retrieving the symbol ID for ticker {ticker}...")
-            raise Exception(f"Something went wrong retrieving the symbol ID for ticker {ticker}...")
+        if stream and as_arrays:
+            raise Exception("stream and as_arrays cannot be combined")
+
+        log.info(
+            "Getting historical data for {0} from {1} to {2}".format(ticker, start_date, end_date)
+        )
+
+        if stream:
+            if interval not in self._valid_intervals():
+                log.error(f"{interval} not a valid interval option.")
+                raise Exception(f"{interval} must be one of {list(self._valid_intervals())}")
+            ids = self._resolve_symbol_ids([ticker])[0]
+            payload = {
+                "startTime": f"{start_date}T00:00:00-05:00",
+                "endTime": f"{end_date}T00:00:00-05:00",
+                "interval": str(interval),
+            }
+            return self._stream_items(f"markets/candles/{ids}", "candles.item", params=payload)
+
+        candles = self._get_candles(ticker, start_date, end_date, interval)
+        if as_arrays:
+            return candles_to_arrays(candles)
+
+        return candles
 
+    def _get_candles(self, ticker: str, start_date: str, end_date: str, interval: str) -> List:
+        """Fetch the buffered candle list for a single ticker.
+
+        Typed helper shared by :meth:`get_historical_data` and the concurrent
+        fan-out in :meth:`get_historical_data_many`.
+        """
         if interval not in self._valid_intervals():
             log.error(f"{interval} not a valid interval option.")
             raise Exception(f"{interval} must be one of {list(self._valid_intervals())}")
 
+        # translate tickers to IDs
+        ids = self._resolve_symbol_ids([ticker])[0]
         payload = {
-            "startTime": str(start_date) + "T00:00:00-05:00",
-            "endTime": str(end_date) + "T00:00:00-05:00",
+            "startTime": f"{start_date}T00:00:00-05:00",
+            "endTime": f"{end_date}T00:00:00-05:00",
             "interval": str(interval),
         }
+        response = self._send_message("get", f"markets/candles/{ids}", params=payload, stream=True)
+        if "candles" not in response:
+            log.error(response)
+            raise Exception("API response is missing 'candles' entry")
 
-        log.info(
-            "Getting historical data for {0} from {1} to {2}".format(ticker, start_date, end_date)
-        )
+        return response["candles"]
 
-        response = self._send_message("get", "markets/candles/" + str(ids), params=payload)
-        try:
-            quotes = response["candles"]
-        except Exception:
-            print(response)
-            raise Exception
+    def get_historical_data_many(
+        self,
+        tickers: List[str],
+        start_date: str,
+        end_date: str,
+        interval: str,
+        max_workers: int = 8,
+    ) -> Dict[str, List]:  # pylint: disable=R0913
+        """Get historical data for several tickers concurrently.
+
+        All symbol IDs are resolved with a single batch lookup first, then the candle
+        requests fan out over a thread pool. The threads share the session's
+        connection pool and the client-side rate limiter, so N tickers cost roughly
+        the latency of N/max_workers serial calls.
 
-        return quotes
+        Parameters
+        ----------
+        tickers: [str]
+            List of ticker symbols
+        start_date: str
+            Date in the format YYYY-MM-DD
+        end_date: str
+            Date in the format YYYY-MM-DD
+        interval: str
+            Time frequency, i.e. OneDay.
+        max_workers: int, optional
+            Number of worker threads used for the fan-out. Default 8.
+
+        Returns
+        -------
+        dict:
+            Dictionary mapping each ticker to its list of candles.
+        """
+        tickers = list(tickers)
+        # one batch round-trip populates the symbol ID cache for all tickers
+        self._resolve_symbol_ids(tickers)
+
+        log.info("Getting historical data for {0} tickers...".format(len(tickers)))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(
+                lambda ticker: self._get_candles(ticker, start_date, end_date, interval),
+                tickers,
+            )
+            return dict(zip(tickers, results))
 
     def submit_order(self, acct_id: int, order_dict: Dict[str, Union[int, bool, str]]) -> Dict:
         """Submit order.
@@ -604,12 +981,18 @@ class Questrade:
         dict
             Dictionary with the API response to the order submission.
         """
-        uri = self.access_token["api_server"] + "/v1/accounts/" + str(acct_id) + "/orders"
+        # client-generated idempotency key so a retried POST cannot double-execute the
+        # order if the first attempt was processed but its response was lost; a
+        # caller-supplied clientOrderId wins, and the header always matches the body
+        order_dict = dict(order_dict)
+        idempotency_key = str(order_dict.setdefault("clientOrderId", uuid.uuid4().hex))
+
         log.info("Posting order...")
-        data = self.session.post(uri, json=order_dict)
-        data.raise_for_status()
         response = self._send_message(
-            "post", "accounts/" + str(acct_id) + "/orders", json=order_dict
+            "post",
+            f"accounts/{acct_id}/orders",
+            json=order_dict,
+            headers={"Idempotency-Key": idempotency_key},
         )
 
         return response
@@ -670,7 +1053,7 @@ class Questrade:
             log.error(f"Something went wrong retrieving the symbol ID for ticker {ticker}...")
             raise Exception(f"Something went wrong retrieving the symbol ID for ticker {ticker}...")
         symbol_id = info["symbolId"]
-        response = self._send_message("get", "symbols/" + str(symbol_id) + "/options")
+        response = self._send_message("get", f"symbols/{symbol_id}/options")
         return response
 
     def get_option_quotes(self, filters: List[Dict], option_ids: List[int]) -> Dict:
@@ -753,9 +1136,25 @@ class Questrade:
         response = self._send_message("post", "markets/quotes/options", json=payload)
         return response
 
+    def close(self):
+        """Close the underlying session and its pooled connections.
+
+        Shared sessions passed in by the caller are left open.
+        """
+        if self._owns_session:
+            self.session.close()
+
+    def __enter__(self):
+        """Enter the runtime context for use as a context manager."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Close the session when the context manager exits."""
+        self.close()
+
     def __del__(self):
         """Close session when class instance is deleted."""
-        self.session.close()
+        self.close()
 
     @staticmethod
     def _valid_intervals():
@@ -1,9 +1,8 @@
 """Collection of utility functions."""
+import json
 import logging
 import sys
-from typing import Optional
-
-import yaml
+from typing import Any, Dict, Mapping
 
 if sys.version_info < (3, 8, 0):
     from typing_extensions import TypedDict
@@ -30,10 +29,13 @@ TokenDict = TypedDict(
 def get_access_token_yaml(token_yaml: str) -> TokenDict:
     """Read in access token yaml.
 
+    Files with a ``.json`` extension are parsed with the (much faster) json module;
+    anything else is treated as yaml.
+
     Parameters
     ----------
     token_yaml: str
-        Path of the token yaml file
+        Path of the token yaml or json file
 
     Returns
     -------
@@ -42,54 +44,83 @@ def get_access_token_yaml(token_yaml: str) -> TokenDict:
     """
     try:
         with open(token_yaml) as yaml_file:
-            log.debug("Loading access token from yaml...")
-            token_yaml_payload: TokenDict = yaml.load(yaml_file, Loader=yaml.FullLoader)
+            if token_yaml.endswith(".json"):
+                log.debug("Loading access token from json...")
+                token_yaml_payload: TokenDict = json.load(yaml_file)
+            else:
+                log.debug("Loading access token from yaml...")
+                # deferred so importing qtrade does not pay the PyYAML import (the
+                # json branch and access-code construction never need it); prefer
+                # the libyaml-backed C loader when available
+                import yaml
+
+                loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+                token_yaml_payload = yaml.load(yaml_file, Loader=loader)
     except Exception:
         log.error("Error loading access token from yaml...")
         raise
 
-    validate_access_token(**token_yaml_payload)
+    validate_access_token(token_yaml_payload)
     return token_yaml_payload
 
 
-def validate_access_token(
-    access_token: Optional[str] = None,
-    api_server: Optional[str] = None,
-    expires_in: Optional[int] = None,
-    refresh_token: Optional[str] = None,
-    token_type: Optional[str] = None,
-):
+def candles_to_arrays(candles) -> Dict:
+    """Convert a list of candle dictionaries to a dictionary of NumPy arrays.
+
+    Moving from a list of dicts to one contiguous array per field means downstream
+    statistics (moving averages, standard deviations, etc.) run in NumPy's C loops
+    instead of Python-level dict lookups per candle. Requires the optional ``numpy``
+    dependency.
+
+    Parameters
+    ----------
+    candles: list
+        List of candle dictionaries as returned by the markets/candles endpoint
+
+    Returns
+    -------
+    dict
+        Dictionary mapping the numeric candle fields (open, high, low, close, VWAP,
+        volume) to NumPy arrays, ordered like the input list.
+    """
+    import numpy as np  # local import so numpy stays an optional dependency
+
+    count = len(candles)
+    arrays = {
+        field: np.fromiter((candle[field] for candle in candles), dtype=np.float64, count=count)
+        for field in ("open", "high", "low", "close", "VWAP")
+    }
+    arrays["volume"] = np.fromiter(
+        (candle["volume"] for candle in candles), dtype=np.int64, count=count
+    )
+    return arrays
+
+
+def validate_access_token(token: Mapping[str, Any]):
     """Validate access token.
 
-    This function validates the access token and ensures that all requiered
-    attributes are provided.
+    This function validates the access token payload and ensures that all requiered
+    entries are provided. The parsed dict is passed by reference, so no kwargs dict
+    has to be rebuilt per call.
 
     Parameters
     ----------
-    access_token: str, optional
-        Access token
-    api_server: str, optional
-        Api server URL
-    expires_in: int, optional
-        Time until token expires
-    refresh_token: str, optional
-        Refresh token
-    token_type: str, optional
-        Token type
+    token: mapping
+        Mapping with the access token parameters
 
     Raises
     ------
     Exception
-        If any of the inputs is None.
+        If any of the required entries is missing.
     """
     log.debug("Validating access token...")
-    if access_token is None:
+    if token.get("access_token") is None:
         raise Exception("Access token was not provided.")
-    if api_server is None:
+    if token.get("api_server") is None:
         raise Exception("API server URL was not provided.")
-    if expires_in is None:
+    if token.get("expires_in") is None:
         raise Exception("Expiry time was not provided.")
-    if refresh_token is None:
+    if token.get("refresh_token") is None:
         raise Exception("Refresh token was not provided.")
-    if token_type is None:
+    if token.get("token_type") is None:
         raise Exception("Token type was not provided.")
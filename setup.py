@@ -6,6 +6,7 @@ CURR_DIR = os.path.abspath(os.path.dirname(__file__))
 INSTALL_REQUIRES = [
     "PyYAML>=5.1",
     "requests>=2.14.2",
+    "urllib3>=1.26",
 ]
 with open(os.path.join(CURR_DIR, "README.md"), encoding="utf-8") as file_open:
     LONG_DESCRIPTION = file_open.read()
@@ -22,5 +23,11 @@ setup(
     license="MIT",
     packages=find_packages(),
     install_requires=INSTALL_REQUIRES,
+    extras_require={
+        "async": ["aiohttp>=3.0"],
+        "fastjson": ["orjson>=3.0"],
+        "stream": ["ijson>=3.0"],
+        "arrays": ["numpy>=1.17"],
+    },
     zip_safe=False,
 )
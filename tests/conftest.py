@@ -0,0 +1,41 @@
+"""Shared fixtures and token constants for the test suite."""
+
+from unittest import mock
+
+import pytest
+import yaml
+
+ACCESS_TOKEN_YAML = """access_token: hunter2
+api_server: http://www.api_url.com
+expires_in: 1234
+refresh_token: hunter2
+token_type: Bearer
+"""
+
+EXPECTED_TOKEN_KEYS = frozenset(
+    {"access_token", "api_server", "expires_in", "refresh_token", "token_type"}
+)
+
+INCOMPLETE_ACCESS_TOKEN_YAML = """access_token: hunter2
+api_server: http://www.api_url.com
+expires_in: 1234
+"""
+
+# parsed once per session; tests that only need the dict skip the yaml parse entirely
+TOKEN_DICT = yaml.safe_load(ACCESS_TOKEN_YAML)
+
+# built once for the whole session; MagicMock construction is the expensive part of
+# mock_open, the patch itself is entered per module
+_OPEN_YAML = mock.mock_open(read_data=ACCESS_TOKEN_YAML)
+
+
+@pytest.fixture(scope="module")
+def open_yaml():
+    """Patch builtins.open with the complete token yaml for the requesting module.
+
+    The patch is module-scoped rather than session-scoped on purpose: the utility
+    tests rely on the real open raising for missing files, so the mock must not stay
+    installed across modules.
+    """
+    with mock.patch("builtins.open", _OPEN_YAML):
+        yield _OPEN_YAML
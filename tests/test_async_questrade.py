@@ -0,0 +1,64 @@
+"""Async Questrade test module
+"""
+
+import asyncio
+from unittest import mock
+
+import pytest
+from conftest import TOKEN_DICT
+
+from qtrade.async_questrade import AsyncQuestrade
+
+TICKER_INFO = {"symbol": "XYZ", "symbolId": 1234567}
+
+
+def test_send_message_requires_context():
+    """This function tests that sending requests outside the context manager raises."""
+    qtrade = AsyncQuestrade(token_yaml="access_token.yml")
+    with pytest.raises(Exception) as e_info:
+        asyncio.run(qtrade._send_message("get", "accounts"))
+    assert "Session not started" in str(e_info.value)
+
+
+def test_context_manager_opens_and_closes_session():
+    """This function tests the session and semaphore lifecycle of the context manager."""
+    session = mock.MagicMock()
+    session.close = mock.AsyncMock()
+
+    async def run():
+        with mock.patch(
+            "qtrade.async_questrade.get_access_token_yaml", return_value=dict(TOKEN_DICT)
+        ), mock.patch("aiohttp.TCPConnector"), mock.patch(
+            "aiohttp.ClientSession", return_value=session
+        ):
+            async with AsyncQuestrade(token_yaml="access_token.yml") as qtrade:
+                assert qtrade._session is session
+                assert qtrade._semaphore is not None
+        assert qtrade._session is None
+
+    asyncio.run(run())
+    session.close.assert_awaited_once()
+
+
+def test_ticker_information():
+    """This function tests the ticker information coroutine."""
+
+    async def fake_send(self, method, endpoint, params=None, json=None):
+        return {"symbols": [TICKER_INFO]}
+
+    qtrade = AsyncQuestrade(token_yaml="access_token.yml")
+    with mock.patch.object(AsyncQuestrade, "_send_message", fake_send):
+        assert asyncio.run(qtrade.ticker_information("XYZ")) == TICKER_INFO
+
+
+def test_ticker_information_missing_entry():
+    """This function tests the error behaviour for a malformed symbols response."""
+
+    async def fake_send(self, method, endpoint, params=None, json=None):
+        return {}
+
+    qtrade = AsyncQuestrade(token_yaml="access_token.yml")
+    with mock.patch.object(AsyncQuestrade, "_send_message", fake_send):
+        with pytest.raises(Exception) as e_info:
+            asyncio.run(qtrade.ticker_information("XYZ"))
+    assert str(e_info.value) == "API response is missing 'symbols' entry"
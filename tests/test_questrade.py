@@ -1,12 +1,18 @@
 """Questrade test module
 """
 
+import io
+import json
+import time
+from types import MappingProxyType
 from unittest import mock
 
 import pytest
+from conftest import EXPECTED_TOKEN_KEYS, INCOMPLETE_ACCESS_TOKEN_YAML, TOKEN_DICT
 from requests import Session
 
 from qtrade import Questrade
+from qtrade.questrade import _RateLimiter
 
 TOKEN_URL = "https://login.questrade.com/oauth2/token?grant_type=refresh_token&refresh_token="
 
@@ -25,168 +31,180 @@ INVALID_ACCESS_TOKEN = {
     "refresh_token": "hunter3",
 }
 ACCOUNT_RESPONSE = {"accounts": [{"number": 123}, {"number": 456}]}
-POSITION_RESPONSE = {
-    "positions": [
-        {
-            "averageEntryPrice": 1000,
-            "closedPnl": 0,
-            "closedQuantity": 0,
-            "currentMarketValue": 3120,
-            "currentPrice": 1040,
-            "isRealTime": False,
-            "isUnderReorg": False,
-            "openPnl": 120,
-            "openQuantity": 3,
-            "symbol": "XYZ",
-            "symbolId": 1234567,
-            "totalCost": 3000,
-        },
-        {
-            "averageEntryPrice": 500,
-            "closedPnl": 0,
-            "closedQuantity": 0,
-            "currentMarketValue": 4000,
-            "currentPrice": 1000,
-            "isRealTime": False,
-            "isUnderReorg": False,
-            "openPnl": 2000,
-            "openQuantity": 4,
-            "symbol": "ABC",
-            "symbolId": 7654321,
-            "totalCost": 2000,
-        },
-    ]
-}
-
-BALANCE_RESPONSE = {
-    "perCurrencyBalances": [
-        {
-            "currency": "CAD",
-            "cash": -0.0025,
-            "marketValue": 0,
-            "totalEquity": -0.0025,
-            "buyingPower": -0.008325,
-            "maintenanceExcess": -0.0025,
-            "isRealTime": True,
-        },
-        {
-            "currency": "USD",
-            "cash": 6.304468,
-            "marketValue": 124.35,
-            "totalEquity": 130.654468,
-            "buyingPower": 232.282378,
-            "maintenanceExcess": 69.754468,
-            "isRealTime": True,
-        },
-    ],
-    "combinedBalances": [
-        {
-            "currency": "CAD",
-            "cash": 7.921271,
-            "marketValue": 156.289298,
-            "totalEquity": 164.210568,
-            "buyingPower": 291.935782,
-            "maintenanceExcess": 87.668403,
-            "isRealTime": True,
-        },
-        {
-            "currency": "USD",
-            "cash": 6.302479,
-            "marketValue": 124.35,
-            "totalEquity": 130.652479,
-            "buyingPower": 232.275755,
-            "maintenanceExcess": 69.752479,
-            "isRealTime": True,
-        },
-    ],
-    "sodPerCurrencyBalances": [
-        {
-            "currency": "CAD",
-            "cash": -0.0025,
-            "marketValue": 0,
-            "totalEquity": -0.0025,
-            "buyingPower": -0.008325,
-            "maintenanceExcess": -0.0025,
-            "isRealTime": True,
-        },
-        {
-            "currency": "USD",
-            "cash": 6.304468,
-            "marketValue": 126.9,
-            "totalEquity": 133.204468,
-            "buyingPower": 232.282378,
-            "maintenanceExcess": 69.754468,
-            "isRealTime": True,
-        },
-    ],
-    "sodCombinedBalances": [
-        {
-            "currency": "CAD",
-            "cash": 7.921271,
-            "marketValue": 159.494265,
-            "totalEquity": 167.415536,
-            "buyingPower": 291.935782,
-            "maintenanceExcess": 87.668403,
-            "isRealTime": True,
-        },
-        {
-            "currency": "USD",
-            "cash": 6.302479,
-            "marketValue": 126.9,
-            "totalEquity": 133.202479,
-            "buyingPower": 232.275755,
-            "maintenanceExcess": 69.752479,
-            "isRealTime": True,
-        },
-    ],
-}
-
-ACTIVITY_RESPONSE = {
-    "activities": [
-        {
-            "action": "Buy",
-            "commission": -5.01,
-            "currency": "CAD",
-            "description": "description text",
-            "grossAmount": -1000,
-            "netAmount": -1005.01,
-            "price": 10,
-            "quantity": 100,
-            "settlementDate": "2018-08-09T00:00:00.000000-04:00",
-            "symbol": "XYZ.TO",
-            "symbolId": 1234567,
-            "tradeDate": "2018-08-07T00:00:00.000000-04:00",
-            "transactionDate": "2018-08-09T00:00:00.000000-04:00",
-            "type": "Trades",
-        }
-    ]
-}
-
-EXECUTION_RESPONSE = {
-    "executions": [
-        {
-            "symbol": "AAPL",
-            "symbolId": 8049,
-            "quantity": 10,
-            "side": "Buy",
-            "price": 536.87,
-            "id": 53817310,
-            "orderId": 177106005,
-            "orderChainId": 17710600,
-            "exchangeExecId": "XS1771060050147",
-            "timestam": "2014-03-31T13:38:29.000000-04:00",
-            "notes": "",
-            "venue": "LAMP",
-            "totalCost": 5368.7,
-            "orderPlacementCommission": 0,
-            "commission": 4.95,
-            "executionFee": 0,
-            "secFee": 0,
-            "canadianExecutionFee": 0,
-            "parentId": 0,
-        }
-    ]
-}
+POSITION_RESPONSE = MappingProxyType(
+    {
+        "positions": [
+            {
+                "averageEntryPrice": 1000,
+                "closedPnl": 0,
+                "closedQuantity": 0,
+                "currentMarketValue": 3120,
+                "currentPrice": 1040,
+                "isRealTime": False,
+                "isUnderReorg": False,
+                "openPnl": 120,
+                "openQuantity": 3,
+                "symbol": "XYZ",
+                "symbolId": 1234567,
+                "totalCost": 3000,
+            },
+            {
+                "averageEntryPrice": 500,
+                "closedPnl": 0,
+                "closedQuantity": 0,
+                "currentMarketValue": 4000,
+                "currentPrice": 1000,
+                "isRealTime": False,
+                "isUnderReorg": False,
+                "openPnl": 2000,
+                "openQuantity": 4,
+                "symbol": "ABC",
+                "symbolId": 7654321,
+                "totalCost": 2000,
+            },
+        ]
+    }
+)
+
+BALANCE_RESPONSE = MappingProxyType(
+    {
+        "perCurrencyBalances": [
+            {
+                "currency": "CAD",
+                "cash": -0.0025,
+                "marketValue": 0,
+                "totalEquity": -0.0025,
+                "buyingPower": -0.008325,
+                "maintenanceExcess": -0.0025,
+                "isRealTime": True,
+            },
+            {
+                "currency": "USD",
+                "cash": 6.304468,
+                "marketValue": 124.35,
+                "totalEquity": 130.654468,
+                "buyingPower": 232.282378,
+                "maintenanceExcess": 69.754468,
+                "isRealTime": True,
+            },
+        ],
+        "combinedBalances": [
+            {
+                "currency": "CAD",
+                "cash": 7.921271,
+                "marketValue": 156.289298,
+                "totalEquity": 164.210568,
+                "buyingPower": 291.935782,
+                "maintenanceExcess": 87.668403,
+                "isRealTime": True,
+            },
+            {
+                "currency": "USD",
+                "cash": 6.302479,
+                "marketValue": 124.35,
+                "totalEquity": 130.652479,
+                "buyingPower": 232.275755,
+                "maintenanceExcess": 69.752479,
+                "isRealTime": True,
+            },
+        ],
+        "sodPerCurrencyBalances": [
+            {
+                "currency": "CAD",
+                "cash": -0.0025,
+                "marketValue": 0,
+                "totalEquity": -0.0025,
+                "buyingPower": -0.008325,
+                "maintenanceExcess": -0.0025,
+                "isRealTime": True,
+            },
+            {
+                "currency": "USD",
+                "cash": 6.304468,
+                "marketValue": 126.9,
+                "totalEquity": 133.204468,
+                "buyingPower": 232.282378,
+                "maintenanceExcess": 69.754468,
+                "isRealTime": True,
+            },
+        ],
+        "sodCombinedBalances": [
+            {
+                "currency": "CAD",
+                "cash": 7.921271,
+                "marketValue": 159.494265,
+                "totalEquity": 167.415536,
+                "buyingPower": 291.935782,
+                "maintenanceExcess": 87.668403,
+                "isRealTime": True,
+            },
+            {
+                "currency": "USD",
+                "cash": 6.302479,
+                "marketValue": 126.9,
+                "totalEquity": 133.202479,
+                "buyingPower": 232.275755,
+                "maintenanceExcess": 69.752479,
+                "isRealTime": True,
+            },
+        ],
+    }
+)
+
+ACTIVITY_RESPONSE = MappingProxyType(
+    {
+        "activities": [
+            {
+                "action": "Buy",
+                "commission": -5.01,
+                "currency": "CAD",
+                "description": "description text",
+                "grossAmount": -1000,
+                "netAmount": -1005.01,
+                "price": 10,
+                "quantity": 100,
+                "settlementDate": "2018-08-09T00:00:00.000000-04:00",
+                "symbol": "XYZ.TO",
+                "symbolId": 1234567,
+                "tradeDate": "2018-08-07T00:00:00.000000-04:00",
+                "transactionDate": "2018-08-09T00:00:00.000000-04:00",
+                "type": "Trades",
+            }
+        ]
+    }
+)
+
+EXECUTION_RESPONSE = MappingProxyType(
+    {
+        "executions": [
+            {
+                "symbol": "AAPL",
+                "symbolId": 8049,
+                "quantity": 10,
+                "side": "Buy",
+                "price": 536.87,
+                "id": 53817310,
+                "orderId": 177106005,
+                "orderChainId": 17710600,
+                "exchangeExecId": "XS1771060050147",
+                "timestam": "2014-03-31T13:38:29.000000-04:00",
+                "notes": "",
+                "venue": "LAMP",
+                "totalCost": 5368.7,
+                "orderPlacementCommission": 0,
+                "commission": 4.95,
+                "executionFee": 0,
+                "secFee": 0,
+                "canadianExecutionFee": 0,
+                "parentId": 0,
+            }
+        ]
+    }
+)
+
+# nested ticker literals are shared by reference through both ticker responses; the
+# tuple keeps the shared sequence immutable (json serializes it as an array either way)
+_MIN_TICKS = ({"minTick": 0.005, "pivot": 0}, {"minTick": 0.01, "pivot": 0.5})
 
 TICKER_INFO = {
     "averageVol20Days": 2,
@@ -207,7 +225,7 @@ TICKER_INFO = {
     "listingExchange": "TSX",
     "lowPrice52": 9.83,
     "marketCap": 275784564,
-    "minTicks": [{"minTick": 0.005, "pivot": 0}, {"minTick": 0.01, "pivot": 0.5}],
+    "minTicks": _MIN_TICKS,
     "optionContractDeliverables": {"cashInLieu": 0, "underlyings": []},
     "optionDurationType": None,
     "optionExerciseType": None,
@@ -298,17 +316,9 @@ OPTIONS_CHAIN_RESPONSE = {
     ]
 }
 
-ACCESS_TOKEN_YAML = """access_token: hunter2
-api_server: http://www.api_url.com
-expires_in: 1234
-refresh_token: hunter2
-token_type: Bearer
-"""
+ORDER_RESPONSE = {"orderId": 123456789, "orders": [{"id": 123456789, "state": "Queued"}]}
 
-INCOMPLETE_ACCESS_TOKEN_YAML = """access_token: hunter2
-api_server: http://www.api_url.com
-expires_in: 1234
-"""
+_INCOMPLETE_YAML_OPEN = mock.mock_open(read_data=INCOMPLETE_ACCESS_TOKEN_YAML)
 
 
 # taken from https://stackoverflow.com/questions/15753390/how-can-i-mock-requests-and-the-response
@@ -319,171 +329,251 @@ class MockResponse:
 
     def __init__(self, json_data, status_code):
         self.json_data = json_data
+        self.content = json.dumps(json_data, default=dict).encode()
         self.status_code = status_code
+        self.headers = {}
+        kind = {4: "Client", 5: "Server"}.get(status_code // 100)
+        self._err = Exception(f"{status_code} {kind} Error") if kind else None
+
+    @property
+    def raw(self):
+        """Property to return a fresh raw byte stream on each access"""
+        return io.BytesIO(self.content)
+
+    def close(self):
+        """Method to mock closing the response connection"""
+
+    def iter_content(self, chunk_size=1):
+        """Method to yield the mocked content in one chunk"""
+        yield self.content
 
     def json(self):
         """Method to return mocked json data"""
         return self.json_data
 
     def raise_for_status(self):
-        """Method to raise Exceptions for certain returned statuses"""
-        http_error_msg = ""
-        if 400 <= self.status_code < 500:
-            http_error_msg = "%s Client Error" % (self.status_code)
+        """Method to raise the exception precomputed for this status code"""
+        if self._err:
+            raise self._err
 
-        elif 500 <= self.status_code < 600:
-            http_error_msg = "%s Server Error" % (self.status_code)
 
-        if http_error_msg:
-            raise Exception(http_error_msg)
+### Specific request responses ###
 
 
-### Specific request responses ###
+# responses and URL keys are built once at import so the dispatchers below are a
+# single dict lookup per call instead of string concatenation plus chained compares
+_MOCK_404 = MockResponse(None, 404)
+
+_TOKEN_RESPONSES = {
+    TOKEN_URL + "hunter2": MockResponse(VALID_ACCESS_TOKEN, 200),
+    TOKEN_URL + "hunter3": MockResponse(INVALID_ACCESS_TOKEN, 200),
+}
+
+# expected request params, built once instead of as per-call dict literals
+_DATE_RANGE_PARAMS = {
+    "endTime": "2018-08-10T00:00:00-05:00",
+    "startTime": "2018-08-07T00:00:00-05:00",
+}
+_TICKER_SINGLE_PARAMS = {"names": "XYZ"}
+_TICKER_MULTIPLE_PARAMS = {"names": "XYZ,ABC"}
+_QUOTE_SINGLE_PARAMS = {"ids": "1234567"}
+_QUOTE_MULTIPLE_PARAMS = {"ids": "1234567,1234567"}
+_HIST_PARAMS = {
+    "startTime": "2018-08-01T00:00:00-05:00",
+    "interval": "OneDay",
+    "endTime": "2018-08-02T00:00:00-05:00",
+}
+
+_MOCK_TICKER_SINGLE = MockResponse(TICKER_RESPONSE_SINGLE, 200)
+_MOCK_TICKER_MULTIPLE = MockResponse(TICKER_RESPONSE_MULTIPLE, 200)
+_MOCK_QUOTE_SINGLE = MockResponse(QUOTE_RESPONSE_SINGLE, 200)
+_MOCK_QUOTE_MULTIPLE = MockResponse(QUOTE_RESPONSE_MULTIPLE, 200)
+_MOCK_ACTIVITIES = MockResponse(ACTIVITY_RESPONSE, 200)
+_MOCK_EXECUTIONS = MockResponse(EXECUTION_RESPONSE, 200)
+_MOCK_HIST = MockResponse(HIST_RESPONSE, 200)
+_MOCK_OPTIONS = MockResponse(OPTIONS_CHAIN_RESPONSE, 200)
+_MOCK_ORDER = MockResponse(ORDER_RESPONSE, 200)
 
 
 def mocked_access_token_requests_get(*args, **kwargs):
     """mocking access token requests get method"""
-    if args[0] == TOKEN_URL + "hunter2":
-        return MockResponse(VALID_ACCESS_TOKEN, 200)
-    elif args[0] == TOKEN_URL + "hunter3":
-        return MockResponse(INVALID_ACCESS_TOKEN, 200)
-    else:
-        return MockResponse(None, 404)
-
-
-def mocked_acct_id_get(*args, **kwargs):
-    """mocking acct_id requests get"""
-    if args[1] == "http://www.api_url.com/v1/accounts":
-        return MockResponse(ACCOUNT_RESPONSE, 200)
-    else:
-        return MockResponse(None, 404)
-
-
-def mocked_positions_get(*args, **kwargs):
-    """mocking acct_id requests get"""
-    if args[1] == "http://www.api_url.com/v1/accounts/123/positions":
-        return MockResponse(POSITION_RESPONSE, 200)
-    else:
-        return MockResponse(None, 404)
-
-
-def mocked_balances_get(*args, **kwargs):
-    """mocking acct_id requests get"""
-    if args[1] == "http://www.api_url.com/v1/accounts/123/balances":
-        return MockResponse(BALANCE_RESPONSE, 200)
-    else:
-        return MockResponse(None, 404)
-
-
-def mocked_activities_get(*args, **kwargs):
-    """mocking activities requests get"""
-    if args[1] == "http://www.api_url.com/v1/accounts/123/activities" and kwargs["params"] == {
-        "endTime": "2018-08-10T00:00:00-05:00",
-        "startTime": "2018-08-07T00:00:00-05:00",
-    }:
-        return MockResponse(ACTIVITY_RESPONSE, 200)
-    else:
-        return MockResponse(None, 404)
-
-
-def mocked_executions_get(*args, **kwargs):
-    """mocking executions requests get"""
-    if args[1] == "http://www.api_url.com/v1/accounts/123/executions" and kwargs["params"] == {
-        "endTime": "2018-08-10T00:00:00-05:00",
-        "startTime": "2018-08-07T00:00:00-05:00",
-    }:
-        return MockResponse(EXECUTION_RESPONSE, 200)
-    else:
-        return MockResponse(None, 404)
-
-
-def mocked_ticker_get(*args, **kwargs):
-    """mocking ticker info requests get"""
-    if args[1] == "http://www.api_url.com/v1/symbols" and kwargs["params"] == {"names": "XYZ"}:
-        return MockResponse(TICKER_RESPONSE_SINGLE, 200)
-    elif args[1] == "http://www.api_url.com/v1/symbols" and kwargs["params"] == {
-        "names": "XYZ,ABC"
-    }:
-        return MockResponse(TICKER_RESPONSE_MULTIPLE, 200)
-    else:
-        return MockResponse(None, 404)
-
-
-def mocked_quote_get(*args, **kwargs):
-    """mocking quote requests get"""
-    if args[1] == "http://www.api_url.com/v1/symbols" and kwargs["params"] == {"names": "XYZ"}:
-        return MockResponse(TICKER_RESPONSE_SINGLE, 200)
-    elif args[1] == "http://www.api_url.com/v1/symbols" and kwargs["params"] == {
-        "names": "XYZ,ABC"
-    }:
-        return MockResponse(TICKER_RESPONSE_MULTIPLE, 200)
-    if args[1] == "http://www.api_url.com/v1/markets/quotes" and kwargs["params"] == {
-        "ids": "1234567"
-    }:
-        return MockResponse(QUOTE_RESPONSE_SINGLE, 200)
-    elif args[1] == "http://www.api_url.com/v1/markets/quotes" and kwargs["params"] == {
-        "ids": "1234567,1234567"
-    }:
-        return MockResponse(QUOTE_RESPONSE_MULTIPLE, 200)
-    else:
-        return MockResponse(None, 404)
-
-
-def mocked_historical_get(*args, **kwargs):
-    """mocking historical data requests get"""
-    if args[1] == "http://www.api_url.com/v1/symbols" and kwargs["params"] == {"names": "XYZ"}:
-        return MockResponse(TICKER_RESPONSE_SINGLE, 200)
-    if args[1] == "http://www.api_url.com/v1/markets/candles/1234567" and kwargs["params"] == {
-        "startTime": "2018-08-01T00:00:00-05:00",
-        "interval": "OneDay",
-        "endTime": "2018-08-02T00:00:00-05:00",
-    }:
-        return MockResponse(HIST_RESPONSE, 200)
-    else:
-        return MockResponse(None, 404)
-
-
-def mocked_option_chain_get(*args, **kwargs):
-    """mocking option chain requests get"""
-    if args[1] == "http://www.api_url.com/v1/symbols" and kwargs["params"] == {"names": "XYZ"}:
-        return MockResponse(TICKER_RESPONSE_SINGLE, 200)
-    if args[1] == "http://www.api_url.com/v1/symbols/1234567/options":
-        return MockResponse(OPTIONS_CHAIN_RESPONSE, 200)
-    else:
-        return MockResponse(None, 404)
+    return _TOKEN_RESPONSES.get(args[0], _MOCK_404)
+
+
+_API = "http://www.api_url.com/v1"
+
+# every mocked endpoint in one route table keyed by (method, url, params); the
+# dispatcher below replaces the per-endpoint side_effect closures
+_ROUTES = {
+    ("get", f"{_API}/accounts", frozenset()): MockResponse(ACCOUNT_RESPONSE, 200),
+    ("get", f"{_API}/accounts/123/positions", frozenset()): MockResponse(POSITION_RESPONSE, 200),
+    ("get", f"{_API}/accounts/123/balances", frozenset()): MockResponse(BALANCE_RESPONSE, 200),
+    (
+        "get",
+        f"{_API}/accounts/123/activities",
+        frozenset(_DATE_RANGE_PARAMS.items()),
+    ): _MOCK_ACTIVITIES,
+    (
+        "get",
+        f"{_API}/accounts/123/executions",
+        frozenset(_DATE_RANGE_PARAMS.items()),
+    ): _MOCK_EXECUTIONS,
+    ("get", f"{_API}/symbols", frozenset(_TICKER_SINGLE_PARAMS.items())): _MOCK_TICKER_SINGLE,
+    ("get", f"{_API}/symbols", frozenset({("names", "ABC")})): _MOCK_TICKER_SINGLE,
+    ("get", f"{_API}/symbols", frozenset(_TICKER_MULTIPLE_PARAMS.items())): _MOCK_TICKER_MULTIPLE,
+    ("get", f"{_API}/markets/quotes", frozenset(_QUOTE_SINGLE_PARAMS.items())): _MOCK_QUOTE_SINGLE,
+    (
+        "get",
+        f"{_API}/markets/quotes",
+        frozenset(_QUOTE_MULTIPLE_PARAMS.items()),
+    ): _MOCK_QUOTE_MULTIPLE,
+    ("get", f"{_API}/markets/candles/1234567", frozenset(_HIST_PARAMS.items())): _MOCK_HIST,
+    ("get", f"{_API}/symbols/1234567/options", frozenset()): _MOCK_OPTIONS,
+    ("post", f"{_API}/accounts/123/orders", frozenset()): _MOCK_ORDER,
+}
+
+
+def mocked_api(*args, **kwargs):
+    """Dispatch any mocked API request through the route table."""
+    params = kwargs.get("params") or {}
+    return _ROUTES.get((args[0], args[1], frozenset(params.items())), _MOCK_404)
+
+
+### FIXTURES ###
+
+
+@pytest.fixture(autouse=True, scope="module")
+def _patch_open(open_yaml):
+    """Install the shared token-yaml open mock for the whole module."""
+    yield
+
+
+@pytest.fixture
+def patch_request(request):
+    """Patch Session.request with the route-table dispatcher.
+
+    Indirect parametrization can still supply a custom side_effect, but by default
+    every test shares the single mocked_api dispatcher.
+    """
+    side_effect = getattr(request, "param", mocked_api)
+    with mock.patch.object(Session, "request", side_effect=side_effect) as mock_request:
+        yield mock_request
+
+
+@pytest.fixture
+def patch_token_get():
+    """Patch Session.get with the token-endpoint dispatcher.
+
+    Replaces the mock.patch decorator previously stacked on every token test.
+    """
+    patcher = mock.patch.object(Session, "get", side_effect=mocked_access_token_requests_get)
+    with patcher as mock_get:
+        yield mock_get
+
+
+@pytest.fixture
+def patch_session_close():
+    """Patch Session.close so tests can assert on session shutdown."""
+    with mock.patch.object(Session, "close") as mock_close:
+        yield mock_close
+
+
+@pytest.fixture(scope="module")
+def qtrade():
+    """Module-scoped Questrade instance for tests that only read API endpoints.
+
+    The token init runs once for the whole module instead of once per test, from the
+    pre-parsed token dict. The get-only tests never mutate token state, but the
+    quote/historical/option tests do populate the shared _symbol_id_cache; that stays
+    order-independent only because the route table serves every resolution pattern,
+    cached or not. Tests that assert on cache behaviour (call counts, invalidation)
+    or mutate token state use the function-scoped qtrade_fresh fixture instead.
+    """
+    yield Questrade(token_dict=TOKEN_DICT)
+
+
+@pytest.fixture
+def qtrade_fresh():
+    """Function-scoped Questrade instance for tests that mutate instance state.
+
+    Refreshing tokens or invalidating the symbol cache must not leak into other
+    tests, so each of these tests gets its own instance.
+    """
+    yield Questrade(token_dict=TOKEN_DICT)
 
 
 ### TEST FUNCTIONS ###
 
 
-@mock.patch("qtrade.questrade.requests.get", side_effect=mocked_access_token_requests_get)
-def test_del_method_session_close(mock_get):
+def test_rate_limiter_paces_requests():
+    """This function tests that the token bucket sleeps once its burst is used up."""
+    limiter = _RateLimiter(capacity=2, refill_rate=100.0)
+    start = time.monotonic()
+    for _ in range(4):
+        limiter.acquire()
+    assert time.monotonic() - start >= 0.01
+
+
+def test_rate_limiter_throttles_on_low_quota():
+    """This function tests that the refill rate is halved when the quota runs low."""
+    limiter = _RateLimiter(capacity=20, refill_rate=20.0)
+    limiter.throttle_from_headers({"X-RateLimit-Remaining": "2"})
+    assert limiter.refill_rate == 10.0
+    limiter.throttle_from_headers({"X-RateLimit-Remaining": "10"})
+    assert limiter.refill_rate == 10.0
+    limiter.throttle_from_headers({"X-RateLimit-Remaining": "garbage"})
+    assert limiter.refill_rate == 10.0
+
+
+def test_del_method_session_close(patch_token_get, patch_session_close):
     """ "This function tests the successful session closing."""
-    with mock.patch.object(Session, "close") as mock_close:
-        qtrade = Questrade(access_code="hunter2")
-        qtrade.__del__()
-        mock_close.assert_called_once()
+    qtrade = Questrade(access_code="hunter2")
+    qtrade.__del__()
+    patch_session_close.assert_called_once()
+
+
+def test_shared_session_not_closed(patch_token_get, patch_session_close):
+    """This function tests that a caller-provided session survives instance deletion."""
+    shared_session = Session()
+    qtrade = Questrade(access_code="hunter2", session=shared_session)
+    assert qtrade.session is shared_session
+    qtrade.__del__()
+    patch_session_close.assert_not_called()
+
 
+def test_context_manager_session_close(patch_token_get, patch_session_close):
+    """This function tests that the session is closed when used as a context manager."""
+    with Questrade(access_code="hunter2") as qtrade:
+        assert qtrade.access_token["access_token"] == "hunter2"
+    patch_session_close.assert_called_once()
 
-@mock.patch("qtrade.questrade.requests.get", side_effect=mocked_access_token_requests_get)
-def test_get_access_token(mock_get):
+
+@pytest.mark.parametrize(
+    "factory",
+    [
+        lambda: Questrade(access_code="hunter2"),
+        lambda: Questrade(token_yaml="access_token.yml"),
+        lambda: Questrade(token_dict=TOKEN_DICT),
+    ],
+    ids=["access_code", "token_yaml", "token_dict"],
+)
+def test_access_token_keys(patch_token_get, factory):
+    """This function tests that every construction path yields the full token key set."""
+    assert factory().access_token.keys() == EXPECTED_TOKEN_KEYS
+
+
+def test_get_access_token(patch_token_get):
     """This function tests the get access token method."""
     qtrade = Questrade(access_code="hunter2")
-    assert set(qtrade.access_token.keys()) == set(
-        ["access_token", "api_server", "expires_in", "refresh_token", "token_type"]
-    )
+    assert qtrade.access_token["access_token"] == "hunter2"
     with pytest.raises(Exception) as e_info:
         _ = Questrade(access_code="hunter3")
         assert str(e_info.value) == "Token type was not provided."
 
 
-@mock.patch("builtins.open", mock.mock_open(read_data=ACCESS_TOKEN_YAML))
 def test_init_via_yaml():
     """This function tests when the class is initiated via yaml file."""
     qtrade = Questrade(token_yaml="access_token.yml")
-    assert set(qtrade.access_token.keys()) == set(
-        ["access_token", "api_server", "expires_in", "refresh_token", "token_type"]
-    )
     assert qtrade.access_token["access_token"] == "hunter2"
     assert qtrade.access_token["api_server"] == "http://www.api_url.com"
     assert qtrade.access_token["expires_in"] == 1234
@@ -491,70 +581,50 @@ def test_init_via_yaml():
     assert qtrade.access_token["token_type"] == "Bearer"
 
 
-@mock.patch("builtins.open", mock.mock_open(read_data=ACCESS_TOKEN_YAML))
 def test_init_via_incomplete_yaml():
     """This function tests when the class is initiated via incomplete yaml file."""
-    with pytest.raises(Exception) as e_info:
-        _ = Questrade(token_yaml="access_token.yml")
-        assert str(e_info.value) == "Refresh token was not provided."
+    with mock.patch("builtins.open", _INCOMPLETE_YAML_OPEN):
+        with pytest.raises(Exception) as e_info:
+            _ = Questrade(token_yaml="access_token.yml")
+    assert str(e_info.value) == "Refresh token was not provided."
+
+
+def test_init_via_token_dict():
+    """This function tests when the class is initiated via a pre-parsed token dict."""
+    qtrade = Questrade(token_dict=TOKEN_DICT)
+    assert qtrade.access_token["access_token"] == "hunter2"
+    assert qtrade.access_token["api_server"] == "http://www.api_url.com"
 
 
-@mock.patch("builtins.open", mock.mock_open(read_data=ACCESS_TOKEN_YAML))
-@mock.patch("qtrade.questrade.requests.get", side_effect=mocked_access_token_requests_get)
-def test_refresh_token_yaml(mock_get):
+def test_refresh_token_yaml(patch_token_get, qtrade_fresh):
     """This function tests the refresh token method by using the yaml."""
-    qtrade = Questrade(token_yaml="access_token.yml")
-    qtrade.refresh_access_token(from_yaml=True)
-    assert set(qtrade.access_token.keys()) == set(
-        ["access_token", "api_server", "expires_in", "refresh_token", "token_type"]
-    )
-    assert qtrade.access_token["api_server"] == "https://questrade.api"
+    qtrade_fresh.refresh_access_token(from_yaml=True)
+    assert qtrade_fresh.access_token["api_server"] == "https://questrade.api"
 
 
-@mock.patch("builtins.open", mock.mock_open(read_data=ACCESS_TOKEN_YAML))
-@mock.patch("qtrade.questrade.requests.get", side_effect=mocked_access_token_requests_get)
-def test_refresh_token_non_yaml(mock_get):
+def test_refresh_token_non_yaml(patch_token_get, qtrade_fresh):
     """This function tests the refresh token method without yaml use."""
-    qtrade = Questrade(token_yaml="access_token.yml")
-    qtrade.refresh_access_token()
-    assert set(qtrade.access_token.keys()) == set(
-        ["access_token", "api_server", "expires_in", "refresh_token", "token_type"]
-    )
-    assert qtrade.access_token["api_server"] == "https://questrade.api"
+    qtrade_fresh.refresh_access_token()
+    assert qtrade_fresh.access_token["api_server"] == "https://questrade.api"
 
 
-@mock.patch("builtins.open", mock.mock_open(read_data=ACCESS_TOKEN_YAML))
-@mock.patch.object(Session, "request", side_effect=mocked_acct_id_get)
-def test_get_account_id(mock_get):
+def test_get_account_id(patch_request, qtrade):
     """This function tests the account ID function."""
-    qtrade = Questrade(token_yaml="access_token.yml")
     acct_id = qtrade.get_account_id()
     assert acct_id == [123, 456]
 
 
-@mock.patch("builtins.open", mock.mock_open(read_data=ACCESS_TOKEN_YAML))
-@mock.patch.object(Session, "request", side_effect=mocked_positions_get)
-def test_get_positions(mock_get):
+def test_get_positions(patch_request, qtrade):
     """This function tests the get account positions method."""
-    qtrade = Questrade(token_yaml="access_token.yml")
     positions = qtrade.get_account_positions(123)
-    assert positions[0]["symbol"] == "XYZ"
-    assert positions[1]["symbol"] == "ABC"
-    assert positions[0]["currentMarketValue"] == 3120
-    assert positions[1]["currentMarketValue"] == 4000
-    assert len(positions) == 2
-    assert len(positions[0]) == 12
-    assert len(positions[1]) == 12
+    assert positions == POSITION_RESPONSE["positions"]
 
     with pytest.raises(Exception):
         _ = qtrade.get_account_positions(987)
 
 
-@mock.patch("builtins.open", mock.mock_open(read_data=ACCESS_TOKEN_YAML))
-@mock.patch.object(Session, "request", side_effect=mocked_balances_get)
-def test_get_balances(mock_get):
+def test_get_balances(patch_request, qtrade):
     """This function tests the get account balances method."""
-    qtrade = Questrade(token_yaml="access_token.yml")
     balances = qtrade.get_account_balances(123)
     assert len(balances) == 4
     assert list(balances.keys()) == [
@@ -568,89 +638,113 @@ def test_get_balances(mock_get):
         _ = qtrade.get_account_positions(987)
 
 
-@mock.patch("builtins.open", mock.mock_open(read_data=ACCESS_TOKEN_YAML))
-@mock.patch.object(Session, "request", side_effect=mocked_activities_get)
-def test_get_activity(mock_get):
+def test_get_activity(patch_request, qtrade):
     """This function tests the get account activities method."""
-    qtrade = Questrade(token_yaml="access_token.yml")
     activities = qtrade.get_account_activities(123, "2018-08-07", "2018-08-10")
-    assert activities[0]["action"] == "Buy"
-    assert activities[0]["tradeDate"] == "2018-08-07T00:00:00.000000-04:00"
-    assert len(activities) == 1
-    assert len(activities[0]) == 14
+    assert activities == ACTIVITY_RESPONSE["activities"]
 
     with pytest.raises(Exception):
         _ = qtrade.get_account_activities(987, "2018-08-07", "2018-08-10")
 
 
-@mock.patch("builtins.open", mock.mock_open(read_data=ACCESS_TOKEN_YAML))
-@mock.patch.object(Session, "request", side_effect=mocked_executions_get)
-def test_get_execution(mock_get):
+def test_get_execution(patch_request, qtrade):
     """This function tests the get account executions method."""
-    qtrade = Questrade(token_yaml="access_token.yml")
     executions = qtrade.get_account_executions(123, "2018-08-07", "2018-08-10")
-    assert executions[0]["quantity"] == 10
-    assert executions[0]["side"] == "Buy"
-    assert len(executions) == 1
-    assert len(executions[0]) == 19
+    assert executions == EXECUTION_RESPONSE["executions"]
 
     with pytest.raises(Exception):
         _ = qtrade.get_account_executions(987, "2018-08-07", "2018-08-10")
 
 
-@mock.patch("builtins.open", mock.mock_open(read_data=ACCESS_TOKEN_YAML))
-@mock.patch.object(Session, "request", side_effect=mocked_ticker_get)
-def test_get_ticker_information(mock_get):
+@pytest.mark.parametrize("tickers,count", [("XYZ", 1), (["XYZ", "ABC"], 2)])
+def test_get_ticker_information(patch_request, qtrade, tickers, count):
     """This function tests the get ticker information method."""
-    qtrade = Questrade(token_yaml="access_token.yml")
-    ticker_info_single = qtrade.ticker_information("XYZ")
-    assert len(ticker_info_single) == 34
-    assert ticker_info_single["symbol"] == "XYZ"
-    assert ticker_info_single["marketCap"] == 275784564
+    ticker_info = qtrade.ticker_information(tickers)
+    if count == 1:
+        ticker_info = [ticker_info]
+    assert len(ticker_info) == count
+    assert all(len(entry) == 34 for entry in ticker_info)
+    assert ticker_info[0]["symbol"] == "XYZ"
+    assert ticker_info[0]["marketCap"] == 275784564
 
-    ticker_info_multiple = qtrade.ticker_information(["XYZ", "ABC"])
-    assert len(ticker_info_multiple) == 2
-    assert len(ticker_info_multiple[0]) == 34
-    assert len(ticker_info_multiple[1]) == 34
-    assert ticker_info_multiple[0]["symbol"] == "XYZ"
 
-
-@mock.patch("builtins.open", mock.mock_open(read_data=ACCESS_TOKEN_YAML))
-@mock.patch.object(Session, "request", side_effect=mocked_quote_get)
-def test_get_quote(mock_get):
+@pytest.mark.parametrize("tickers,count", [("XYZ", 1), (["XYZ", "ABC"], 2)])
+def test_get_quote(patch_request, qtrade, tickers, count):
     """This function tests the get quote method."""
-    qtrade = Questrade(token_yaml="access_token.yml")
-    quote_single = qtrade.get_quote("XYZ")
-    assert len(quote_single) == 21
-    assert quote_single["high52w"] == 25.00
-    assert quote_single["symbolId"] == 1234567
-
-    quote_multiple = qtrade.get_quote(["XYZ", "ABC"])
-    assert len(quote_multiple) == 2
-    assert len(quote_multiple[0]) == 21
-    assert len(quote_multiple[1]) == 21
-    assert quote_multiple[0]["high52w"] == 25.00
-    assert quote_multiple[1]["high52w"] == 25.00
-
-
-@mock.patch("builtins.open", mock.mock_open(read_data=ACCESS_TOKEN_YAML))
-@mock.patch.object(Session, "request", side_effect=mocked_historical_get)
-def test_get_historical_data(mock_get):
+    quotes = qtrade.get_quote(tickers)
+    if count == 1:
+        quotes = [quotes]
+    assert len(quotes) == count
+    assert all(len(quote) == 21 for quote in quotes)
+    assert all(quote["high52w"] == 25.00 for quote in quotes)
+    assert quotes[0]["symbolId"] == 1234567
+
+
+def test_get_historical_data(patch_request, qtrade):
     """This function tests the get historical data method."""
-    qtrade = Questrade(token_yaml="access_token.yml")
     historical_data = qtrade.get_historical_data("XYZ", "2018-08-01", "2018-08-02", "OneDay")
-    assert len(historical_data) == 2
-    assert len(historical_data[0]) == 8
-    assert len(historical_data[1]) == 8
-    assert historical_data[0]["start"] == "2018-08-01T01:00:00.000000-04:00"
-    assert historical_data[1]["start"] == "2018-08-02T00:00:00.000000-04:00"
+    assert historical_data == HIST_RESPONSE["candles"]
+
+
+def test_get_historical_data_stream(patch_request, qtrade):
+    """This function tests the streaming variant of the get historical data method."""
+    candles = qtrade.get_historical_data("XYZ", "2018-08-01", "2018-08-02", "OneDay", stream=True)
+    candles = list(candles)
+    assert len(candles) == 2
+    assert candles[0]["start"] == "2018-08-01T01:00:00.000000-04:00"
 
 
-@mock.patch("builtins.open", mock.mock_open(read_data=ACCESS_TOKEN_YAML))
-@mock.patch.object(Session, "request", side_effect=mocked_option_chain_get)
-def test_get_option_chain(mock_get):
+def test_get_historical_data_many(patch_request, qtrade_fresh):
+    """This function tests the threaded multi-ticker historical data method."""
+    historical_data = qtrade_fresh.get_historical_data_many(
+        ["XYZ", "ABC"], "2018-08-01", "2018-08-02", "OneDay"
+    )
+    assert set(historical_data.keys()) == set(["XYZ", "ABC"])
+    assert len(historical_data["XYZ"]) == 2
+    assert len(historical_data["ABC"]) == 2
+    # one batch symbol lookup plus one candle request per ticker
+    assert patch_request.call_count == 3
+
+
+def test_get_historical_data_as_arrays(patch_request, qtrade):
+    """This function tests the array variant of the get historical data method."""
+    arrays = qtrade.get_historical_data(
+        "XYZ", "2018-08-01", "2018-08-02", "OneDay", as_arrays=True
+    )
+    assert set(arrays.keys()) == set(["open", "high", "low", "close", "VWAP", "volume"])
+    assert len(arrays["close"]) == 2
+    assert arrays["close"][-1] == 34.4
+    assert arrays["volume"].mean() == (3251329 + 3642444) / 2
+
+
+def test_symbol_id_cache(patch_request, qtrade_fresh):
+    """This function tests that repeated symbol lookups are served from the cache."""
+    _ = qtrade_fresh.get_historical_data("XYZ", "2018-08-01", "2018-08-02", "OneDay")
+    # first call resolves the symbol ID and fetches the candles
+    assert patch_request.call_count == 2
+    _ = qtrade_fresh.get_historical_data("XYZ", "2018-08-01", "2018-08-02", "OneDay")
+    # second call only fetches the candles
+    assert patch_request.call_count == 3
+    qtrade_fresh.invalidate_symbol_cache("XYZ")
+    _ = qtrade_fresh.get_historical_data("XYZ", "2018-08-01", "2018-08-02", "OneDay")
+    assert patch_request.call_count == 5
+
+
+def test_get_option_chain(patch_request, qtrade):
     """This function tests the get historical data method."""
-    qtrade = Questrade(token_yaml="access_token.yml")
     option_chain_data = qtrade.get_option_chain("XYZ")
     assert len(option_chain_data) == 1
     assert len(option_chain_data["options"]) == 1
+
+
+def test_submit_order(patch_request, qtrade_fresh):
+    """This function tests that an order is posted exactly once with an idempotency key."""
+    order_dict = {"symbolId": 1234567, "quantity": 1, "action": "Buy"}
+    response = qtrade_fresh.submit_order(123, order_dict)
+    assert response == ORDER_RESPONSE
+    assert patch_request.call_count == 1
+    # the caller's dict is left untouched; the key is injected into the sent body
+    assert "clientOrderId" not in order_dict
+    sent_body = patch_request.call_args.kwargs["json"]
+    headers = patch_request.call_args.kwargs["headers"]
+    assert headers["Idempotency-Key"] == sent_body["clientOrderId"]
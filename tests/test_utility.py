@@ -1,50 +1,57 @@
 """Utility test module
 """
 from unittest import mock
+
 import pytest
+from conftest import ACCESS_TOKEN_YAML, EXPECTED_TOKEN_KEYS, INCOMPLETE_ACCESS_TOKEN_YAML
+
 from qtrade import utility
 
-ACCESS_TOKEN_YAML = """access_token: hunter2
-api_server: www.api_url.com
-expires_in: 1234
-refresh_token: hunter2
-token_type: Bearer
-"""
+ACCESS_TOKEN_JSON = (
+    '{"access_token": "hunter2", "api_server": "www.api_url.com", "expires_in": 1234, '
+    '"refresh_token": "hunter2", "token_type": "Bearer"}'
+)
 
-INCOMPLETE_ACCESS_TOKEN_YAML = """access_token: hunter2
-api_server: www.api_url.com
-expires_in: 1234
-"""
+# one mock_open per payload, built once at import instead of per decorator
+_YAML_OPEN = mock.mock_open(read_data=ACCESS_TOKEN_YAML)
+_JSON_OPEN = mock.mock_open(read_data=ACCESS_TOKEN_JSON)
+_INCOMPLETE_YAML_OPEN = mock.mock_open(read_data=INCOMPLETE_ACCESS_TOKEN_YAML)
 
 
-@mock.patch("builtins.open", mock.mock_open(read_data=ACCESS_TOKEN_YAML))
+@mock.patch("builtins.open", _YAML_OPEN)
 def test_get_access_token_yaml():
     """This function tests the get access token yaml function
     """
     access_token = utility.get_access_token_yaml("filename.yml")
-    assert set(access_token.keys()) == set(
-        ["access_token", "api_server", "expires_in", "refresh_token", "token_type"]
-    )
+    assert access_token.keys() == EXPECTED_TOKEN_KEYS
     assert access_token["access_token"] == "hunter2"
-    assert access_token["api_server"] == "www.api_url.com"
+    assert access_token["api_server"] == "http://www.api_url.com"
     assert access_token["expires_in"] == 1234
     assert access_token["refresh_token"] == "hunter2"
     assert access_token["token_type"] == "Bearer"
 
 
-def test_get_access_token_error():
-    """This functions tests the error behaviour.
+@mock.patch("builtins.open", _JSON_OPEN)
+def test_get_access_token_json():
+    """This function tests the get access token function for json token files
     """
-
-    with pytest.raises(Exception) as e_info:
-        access_token = utility.get_access_token_yaml("filename.yml")
+    access_token = utility.get_access_token_yaml("filename.json")
+    assert access_token["access_token"] == "hunter2"
+    assert access_token["token_type"] == "Bearer"
 
 
-@mock.patch("builtins.open", mock.mock_open(read_data=INCOMPLETE_ACCESS_TOKEN_YAML))
-def test_get_access_token_yaml_error():
-    """This function tests the get access token yaml function
+@pytest.mark.parametrize(
+    "opener, message",
+    [
+        (mock.MagicMock(side_effect=FileNotFoundError("filename.yml")), "filename.yml"),
+        (_INCOMPLETE_YAML_OPEN, "Refresh token was not provided."),
+    ],
+    ids=["missing_file", "incomplete_yaml"],
+)
+def test_get_access_token_errors(opener, message):
+    """This function tests the error behaviour for missing and incomplete token files.
     """
-    with pytest.raises(Exception) as e_info:
-        _ = utility.get_access_token_yaml("filename.yml")
-
-        assert str(e_info.value) == "Refresh token was not provided."
+    with mock.patch("builtins.open", opener):
+        with pytest.raises(Exception) as e_info:
+            _ = utility.get_access_token_yaml("filename.yml")
+    assert str(e_info.value) == message